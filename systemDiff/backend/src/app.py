@@ -7,21 +7,58 @@ serving diff visualization data to the frontend.
 """
 
 import os
+import re
+import sys
 import json
-import tarfile
-import tempfile
+import time
+import uuid
+import gzip
 import shutil
+import tempfile
+import hashlib
+import tarfile
 import difflib
+import html
 import threading
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
-from pathlib import Path
 
-from flask import Flask, request, jsonify, send_file, make_response
+from flask import Flask, request, jsonify, send_file, make_response, stream_with_context
 from flask_cors import CORS
 import logging
 from werkzeug.utils import secure_filename
 
+# orjson is a C-backed JSON parser/serializer that is several times faster
+# than the stdlib on the multi-MB manifests systemRecord produces; fall back
+# to stdlib json where it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# zstd decompresses roughly twice as fast as gzip at similar ratios; accept
+# .tar.zst uploads when the zstandard package is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _json_loads(data):
+    """Parse JSON bytes/str with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_indented(obj) -> bytes:
+    """Serialize to indented JSON bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
 app = Flask(__name__)
 
 # Configure CORS to allow requests from frontend
@@ -37,39 +74,84 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 UPLOAD_FOLDER = '/tmp/systemdiff_uploads'
+EXPORT_CACHE_FOLDER = '/tmp/systemdiff_exports'
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-ALLOWED_EXTENSIONS = {'tar', 'gz', 'tar.gz'}
+ALLOWED_EXTENSIONS = {'tar', 'gz', 'tar.gz', 'zst', 'tar.zst'}
+
+def _export_etag(project1_id, loaded_at1, project2_id, loaded_at2, format) -> str:
+    """ETag (and cache file stem) for one export of one project pair."""
+    return hashlib.blake2b(
+        f"{project1_id}:{loaded_at1}:{project2_id}:{loaded_at2}:{format}".encode(),
+        digest_size=16
+    ).hexdigest()
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
-# Ensure upload directory exists
+# Filename fragments that mark configuration files worth tracking in
+# generated Mode 2 configs. A single compiled alternation scans each
+# name once instead of one substring search per fragment ('config' is
+# already covered by 'conf' and stays out of the pattern).
+_CFG_RE = re.compile(r'conf|cfg|ini|yaml|yml|json', re.IGNORECASE)
+
+# Ensure upload and export cache directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(EXPORT_CACHE_FOLDER, exist_ok=True)
+
+_ts_cache = (0, '')
+
+def _iso_now() -> str:
+    """Second-granularity ISO timestamp for response payloads.
+
+    Cached between clock ticks so hot endpoints skip the per-request
+    datetime construction. Not for loaded_at stamps, which need
+    sub-second precision as cache-key components.
+    """
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)))
+    return _ts_cache[1]
 
 class ProjectAnalyzer:
     """Analyzes and compares systemRecord project files."""
     
     def __init__(self):
         self.projects = {}
+        self._diff_cache = {}  # (project1_id, project2_id, file_path) -> diff result
+        # LRU-bounded: comparison payloads are large, so only the most
+        # recently used pairs stay resident
+        self._comparison_cache = OrderedDict()  # (p1_id, p2_id, loaded_at1, loaded_at2) -> comparison
+        self._comparison_cache_size = 32
         self.projects_cache_file = "/tmp/systemdiff_uploads/projects_cache.json"
-        self._lock = threading.RLock()  # Reentrant lock for thread safety
+        # _lock guards mutations of the projects dict itself. Project
+        # records are immutable once published (caches inside them are
+        # append-only), so read paths snapshot with a single dict.get and
+        # take no lock - a slow load no longer stalls unrelated requests.
+        self._lock = threading.RLock()
+        self._project_locks = defaultdict(threading.Lock)  # serializes load/delete per id
+        self._tar_locks = defaultdict(threading.Lock)  # per-project tar access
         self._load_projects_cache()
     
     def _load_projects_cache(self):
         """Load projects from cache file."""
         try:
             if os.path.exists(self.projects_cache_file):
-                with open(self.projects_cache_file, 'r') as f:
-                    cache_data = json.load(f)
+                with open(self.projects_cache_file, 'rb') as f:
+                    cache_data = _json_loads(f.read())
                     
                 # Validate and reload projects
                 for project_id, project_info in cache_data.items():
                     tar_path = project_info.get('tar_path')
                     if tar_path and os.path.exists(tar_path):
                         try:
-                            # Reload project from tar file
-                            self.load_project(project_id, tar_path, from_cache=True)
-                            logger.info(f"Restored project {project_id} from cache")
+                            # Prefer the manifest sidecar - restoring from it
+                            # avoids decompressing and re-indexing the tar
+                            if self._load_project_from_sidecar(project_id, tar_path):
+                                logger.info(f"Restored project {project_id} from manifest sidecar")
+                            else:
+                                self.load_project(project_id, tar_path, from_cache=True)
+                                logger.info(f"Restored project {project_id} from cache")
                         except Exception as e:
                             logger.warning(f"Failed to restore project {project_id}: {e}")
                     
@@ -89,162 +171,312 @@ class ProjectAnalyzer:
                 }
             
             os.makedirs(os.path.dirname(self.projects_cache_file), exist_ok=True)
-            with open(self.projects_cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            with open(self.projects_cache_file, 'wb') as f:
+                f.write(_json_dumps_indented(cache_data))
                 
         except Exception as e:
             logger.error(f"Failed to save projects cache: {e}")
     
+    def _invalidate_diff_cache(self, project_id: str):
+        """Drop cached diffs and comparisons that reference a project."""
+        for cache in (self._diff_cache, self._comparison_cache):
+            stale = [key for key in cache if project_id in key[:2]]
+            for key in stale:
+                del cache[key]
+
+    def _build_project_info(self, project_id: str, tar_path: str, manifest: Dict,
+                            tar: Optional[tarfile.TarFile] = None,
+                            members: Optional[Dict] = None) -> Dict:
+        """Build the in-memory project record from a parsed manifest.
+
+        Aggregates summary figures once so summary requests never re-walk
+        the (potentially huge) files dict, and flattens path -> hash so
+        comparisons skip the nested per-file dicts entirely.
+        """
+        files = manifest.get('files', {})
+
+        # Every entry duplicates its own key in a 'path' field; drop it so
+        # large manifests don't hold each path string twice. API payloads
+        # carry the path explicitly on their wrappers. Interning the hash
+        # strings deduplicates them across the two loaded manifests (most
+        # files are unchanged, so both carry the same sha256 text) and
+        # turns the hash comparison in compare_projects into a pointer
+        # check in the common equal case.
+        for f in files.values():
+            f.pop('path', None)
+            file_hash = f.get('hash')
+            if file_hash is not None:
+                f['hash'] = sys.intern(file_hash)
+
+        hash_index = {sys.intern(path): f.get('hash') for path, f in files.items()}
+        summary = {
+            'metadata': manifest.get('metadata', {}),
+            'file_count': len(files),
+            'directory_count': len(manifest.get('directories', {})),
+            'archived_count': sum(1 for f in files.values() if f.get('archived', False)),
+            'error_count': len(manifest.get('errors', []))
+        }
+
+        return {
+            'id': project_id,
+            'manifest': manifest,
+            'summary': summary,
+            'hash_index': hash_index,
+            'tar_path': tar_path,
+            'tar': tar,
+            'members': members,
+            'content_cache': {},
+            'line_cache': {},
+            'loaded_at': datetime.now().isoformat()
+        }
+
+    def _manifest_sidecar_path(self, project_id: str) -> str:
+        return os.path.join(UPLOAD_FOLDER, f"{project_id}.manifest.json")
+
+    def _save_manifest_sidecar(self, project_id: str, manifest: Dict):
+        """Write the parsed manifest next to the upload for fast restarts."""
+        try:
+            sidecar_path = self._manifest_sidecar_path(project_id)
+            tmp_path = f"{sidecar_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_json_dumps_indented(manifest))
+            os.replace(tmp_path, sidecar_path)
+        except Exception as e:
+            logger.warning(f"Failed to save manifest sidecar for {project_id}: {e}")
+
+    def _load_project_from_sidecar(self, project_id: str, tar_path: str) -> bool:
+        """Restore a project from its manifest sidecar, if valid.
+
+        Returns False when no up-to-date sidecar exists; the caller then
+        falls back to the tar. The tar handle is opened lazily on the
+        first content extraction.
+        """
+        sidecar_path = self._manifest_sidecar_path(project_id)
+        try:
+            if not os.path.exists(sidecar_path):
+                return False
+            if os.path.getmtime(sidecar_path) < os.path.getmtime(tar_path):
+                return False
+
+            with open(sidecar_path, 'rb') as f:
+                manifest = _json_loads(f.read())
+
+            self.projects[project_id] = self._build_project_info(project_id, tar_path, manifest)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to restore {project_id} from sidecar: {e}")
+            return False
+
+    def _ensure_tar(self, project: Dict):
+        """Open the tar handle and member index on first use."""
+        if project.get('tar') is None:
+            with self._tar_locks[project['id']]:
+                if project.get('tar') is None:
+                    tar = self._open_tar(project['tar_path'])
+                    project['members'] = {m.name: m for m in tar.getmembers()}
+                    project['tar'] = tar
+
+    @staticmethod
+    def _derived_tar_path(tar_path: str) -> Optional[str]:
+        """Path of the plain .tar that _open_tar materializes next to a
+        compressed upload, or None when the archive is opened in place."""
+        if tar_path.endswith('.zst'):
+            return tar_path[:-len('.zst')]
+        if tar_path.endswith('.gz'):
+            plain_path = tar_path[:-len('.gz')]
+            if not plain_path.endswith('.tar'):
+                plain_path += '.tar'
+            return plain_path
+        return None
+
+    def _open_tar(self, tar_path: str) -> tarfile.TarFile:
+        """Open a project archive for random member access.
+
+        Compressed archives (.tar.gz/.tar.zst) are decompressed once to a
+        plain .tar next to the upload and that is opened instead: seeking
+        inside a compressed stream re-inflates from byte 0 on every member,
+        so clicking through N files would re-decompress the archive N
+        times. This trades archive-sized disk for O(1) member seeks.
+        """
+        if tar_path.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError("zstandard package is required to read .tar.zst archives")
+
+            plain_path = self._derived_tar_path(tar_path)
+            if not os.path.exists(plain_path) or os.path.getmtime(plain_path) < os.path.getmtime(tar_path):
+                with open(tar_path, 'rb') as src, open(plain_path, 'wb') as dst:
+                    zstandard.ZstdDecompressor().copy_stream(src, dst)
+            return tarfile.open(plain_path, 'r:')
+
+        if tar_path.endswith('.gz'):
+            plain_path = self._derived_tar_path(tar_path)
+            if not os.path.exists(plain_path) or os.path.getmtime(plain_path) < os.path.getmtime(tar_path):
+                with gzip.open(tar_path, 'rb') as src, open(plain_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, length=1024 * 1024)
+            return tarfile.open(plain_path, 'r:')
+
+        return tarfile.open(tar_path, 'r:*')
+
+    def _close_project_tar(self, project_id: str):
+        """Close the cached tar handle for a project, if one is open."""
+        project = self.projects.get(project_id)
+        if project and project.get('tar') is not None:
+            try:
+                project['tar'].close()
+            except Exception as e:
+                logger.warning(f"Failed to close tar handle for project {project_id}: {e}")
+
     def load_project(self, project_id: str, tar_path: str, from_cache: bool = False) -> Dict:
         """Load a project from tar file and extract manifest."""
-        with self._lock:  # Thread safety
+        # Serialize per project id only - the expensive decompress/parse
+        # phase runs outside the global lock so loads of other projects
+        # and all read-only requests proceed concurrently
+        with self._project_locks[project_id]:
             logger.info(f"Loading project {project_id} from {tar_path}")
-            
+
             try:
-                # Verify file exists and is readable
-                if not os.path.exists(tar_path):
+                # One stat covers the exists + size checks; a permission
+                # problem surfaces as the accurate OSError from open below
+                try:
+                    file_size = os.stat(tar_path).st_size
+                except FileNotFoundError:
                     raise FileNotFoundError(f"Project file not found: {tar_path}")
-                
-                if not os.access(tar_path, os.R_OK):
-                    raise PermissionError(f"Cannot read project file: {tar_path}")
-                
-                # Check file size
-                file_size = os.path.getsize(tar_path)
+
                 logger.info(f"Project file size: {file_size} bytes")
-                
+
                 if file_size == 0:
                     raise ValueError("Project file is empty")
-                
-                # Create temporary directory for extraction
-                temp_dir = tempfile.mkdtemp(prefix=f"project_{project_id}_")
-                logger.info(f"Extracting to temporary directory: {temp_dir}")
-                
-                # Extract tar file with better error handling
+
+                # Read the manifest directly from the archive - no need to
+                # extract every member to disk just to parse one file.
+                # systemRecord writes manifest.json as the first member, so
+                # getmember stops scanning almost immediately; the full
+                # member index is built lazily on first content extraction.
+                tar = None
                 try:
-                    with tarfile.open(tar_path, 'r:*') as tar:
-                        # Check if tar file is valid
-                        tar_members = tar.getmembers()
-                        logger.info(f"Tar file contains {len(tar_members)} members")
-                        tar.extractall(temp_dir)
+                    tar = self._open_tar(tar_path)
+                    try:
+                        manifest_member = tar.getmember('manifest.json')
+                    except KeyError:
+                        logger.error(f"Manifest not found in archive: {tar_path}")
+                        raise ValueError("No manifest.json found in project file")
+
+                    manifest_file = tar.extractfile(manifest_member)
+                    if manifest_file is None:
+                        raise ValueError("Could not read manifest.json from project file")
+
+                    manifest = _json_loads(manifest_file.read())
                 except tarfile.TarError as e:
                     raise ValueError(f"Invalid tar file format: {e}")
-                
-                # Load manifest
-                manifest_path = os.path.join(temp_dir, 'manifest.json')
-                if not os.path.exists(manifest_path):
-                    # List contents of temp_dir for debugging
-                    contents = os.listdir(temp_dir)
-                    logger.error(f"Manifest not found. Directory contents: {contents}")
-                    raise ValueError("No manifest.json found in project file")
-                
-                with open(manifest_path, 'r') as f:
-                    manifest = json.load(f)
-                
-                # Store project info
-                project_info = {
-                    'id': project_id,
-                    'manifest': manifest,
-                    'temp_dir': temp_dir,
-                    'tar_path': tar_path,
-                    'loaded_at': datetime.now().isoformat()
-                }
-                
-                self.projects[project_id] = project_info
-                
-                # Save projects cache (but not when loading from cache to avoid recursion)
-                if not from_cache:
-                    self._save_projects_cache()
-                
+                finally:
+                    if tar is not None:
+                        tar.close()
+
+                project_info = self._build_project_info(project_id, tar_path, manifest)
+
+                with self._lock:
+                    # Close any handle and drop cached diffs left over from
+                    # a previous load of this id, then publish the record
+                    self._close_project_tar(project_id)
+                    self._invalidate_diff_cache(project_id)
+                    self.projects[project_id] = project_info
+
+                    # Save projects cache (but not when loading from cache to avoid recursion)
+                    if not from_cache:
+                        self._save_projects_cache()
+
+                # Persist the parsed manifest so the next restart can skip
+                # the tar entirely
+                self._save_manifest_sidecar(project_id, manifest)
+
+                summary = project_info['summary']
                 return {
                     'id': project_id,
-                    'metadata': manifest.get('metadata', {}),
-                    'file_count': len(manifest.get('files', {})),
-                    'directory_count': len(manifest.get('directories', {})),
-                    'error_count': len(manifest.get('errors', []))
+                    'metadata': summary['metadata'],
+                    'file_count': summary['file_count'],
+                    'directory_count': summary['directory_count'],
+                    'error_count': summary['error_count']
                 }
-                
+
             except Exception as e:
                 logger.error(f"Error loading project {project_id}: {e}")
                 raise
     
     def get_project_summary(self, project_id: str) -> Dict:
         """Get summary information for a project."""
-        with self._lock:
-            if project_id not in self.projects:
-                raise ValueError(f"Project {project_id} not found")
-            
-            project = self.projects[project_id]
-            manifest = project['manifest']
-        
+        project = self.projects.get(project_id)
+        if project is None:
+            raise ValueError(f"Project {project_id} not found")
+
+        summary = project['summary']
         return {
             'id': project_id,
-            'metadata': manifest.get('metadata', {}),
+            'metadata': summary['metadata'],
             'statistics': {
-                'total_files': len(manifest.get('files', {})),
-                'total_directories': len(manifest.get('directories', {})),
-                'archived_files': sum(1 for f in manifest.get('files', {}).values() if f.get('archived', False)),
-                'errors': len(manifest.get('errors', []))
+                'total_files': summary['file_count'],
+                'total_directories': summary['directory_count'],
+                'archived_files': summary['archived_count'],
+                'errors': summary['error_count']
             },
             'loaded_at': project['loaded_at']
         }
     
     def compare_projects(self, project1_id: str, project2_id: str) -> Dict:
         """Compare two projects and return differences."""
-        with self._lock:
-            if project1_id not in self.projects or project2_id not in self.projects:
-                raise ValueError("One or both projects not found")
-            
-            logger.info(f"Comparing projects {project1_id} and {project2_id}")
-            
-            project1 = self.projects[project1_id]
-            project2 = self.projects[project2_id]
-        
-        manifest1 = project1['manifest']
-        manifest2 = project2['manifest']
-        
-        files1 = manifest1.get('files', {})
-        files2 = manifest2.get('files', {})
-        
-        # Find differences
-        all_paths = set(files1.keys()) | set(files2.keys())
-        
+        # A single dict.get snapshots each immutable project record; no
+        # lock needed for the whole comparison
+        project1 = self.projects.get(project1_id)
+        project2 = self.projects.get(project2_id)
+        if project1 is None or project2 is None:
+            raise ValueError("One or both projects not found")
+
+        # Projects are immutable once loaded, so the comparison is a pure
+        # function of the ids plus their load timestamps. The compare, export
+        # and generate-config endpoints all reuse the cached result.
+        cache_key = (project1_id, project2_id, project1['loaded_at'], project2['loaded_at'])
+        cached = self._comparison_cache.get(cache_key)
+        if cached is not None:
+            self._comparison_cache.move_to_end(cache_key)
+            return cached
+
+        logger.info(f"Comparing projects {project1_id} and {project2_id}")
+
+        files1 = project1['manifest'].get('files', {})
+        files2 = project2['manifest'].get('files', {})
+        hashes1 = project1['hash_index']
+        hashes2 = project2['hash_index']
+
+        # Find differences with set algebra - the added/deleted/common
+        # bucketing happens in C instead of two dict probes per path. The
+        # flat hash index keeps the modified/unchanged split out of the
+        # nested per-file dicts; full file info is fetched only for the
+        # (small) changed subsets when building the payload.
+        keys1 = hashes1.keys()
+        keys2 = hashes2.keys()
+
         changes = {
-            'new_files': [],
-            'deleted_files': [],
-            'modified_files': [],
-            'unchanged_files': []
+            'new_files': [
+                {'path': path, 'file': files2[path]}
+                for path in keys2 - keys1
+            ],
+            'deleted_files': [
+                {'path': path, 'file': files1[path]}
+                for path in keys1 - keys2
+            ],
+            'modified_files': []
         }
-        
-        for path in all_paths:
-            if path in files1 and path in files2:
-                # File exists in both
-                file1 = files1[path]
-                file2 = files2[path]
-                
-                if file1.get('hash') != file2.get('hash'):
-                    changes['modified_files'].append({
-                        'path': path,
-                        'before': file1,
-                        'after': file2
-                    })
-                else:
-                    changes['unchanged_files'].append({
-                        'path': path,
-                        'file': file1
-                    })
-            elif path in files1:
-                # File deleted
-                changes['deleted_files'].append({
-                    'path': path,
-                    'file': files1[path]
-                })
-            else:
-                # File added
-                changes['new_files'].append({
-                    'path': path,
-                    'file': files2[path]
-                })
-        
+
+        # Unchanged files are typically the overwhelming majority of entries;
+        # only their count goes into the payload. The paginated
+        # /api/compare/<p1>/<p2>/unchanged endpoint serves the entries on
+        # demand.
+        common = keys1 & keys2
+        changes['modified_files'] = [
+            {'path': path, 'before': files1[path], 'after': files2[path]}
+            for path in common
+            if hashes1[path] != hashes2[path]
+        ]
+
         # Calculate statistics
         stats = {
             'total_files_before': len(files1),
@@ -252,93 +484,217 @@ class ProjectAnalyzer:
             'new_files': len(changes['new_files']),
             'deleted_files': len(changes['deleted_files']),
             'modified_files': len(changes['modified_files']),
-            'unchanged_files': len(changes['unchanged_files'])
+            'unchanged_files': len(common) - len(changes['modified_files'])
         }
         
-        return {
+        comparison = {
             'project1': project1_id,
             'project2': project2_id,
-            'comparison_date': datetime.now().isoformat(),
+            'comparison_date': _iso_now(),
             'statistics': stats,
             'changes': changes
         }
+        self._comparison_cache[cache_key] = comparison
+        while len(self._comparison_cache) > self._comparison_cache_size:
+            self._comparison_cache.popitem(last=False)
+        return comparison
     
+    def get_unchanged_files(self, project1_id: str, project2_id: str,
+                            offset: int = 0, limit: int = 100) -> Dict:
+        """Get a page of files that are identical in both projects."""
+        project1 = self.projects.get(project1_id)
+        project2 = self.projects.get(project2_id)
+        if project1 is None or project2 is None:
+            raise ValueError("One or both projects not found")
+
+        files1 = project1['manifest'].get('files', {})
+        files2 = project2['manifest'].get('files', {})
+
+        unchanged = sorted(
+            path for path in files1.keys() & files2.keys()
+            if files1[path].get('hash') == files2[path].get('hash')
+        )
+
+        page = unchanged[offset:offset + limit]
+
+        return {
+            'project1': project1_id,
+            'project2': project2_id,
+            'total_count': len(unchanged),
+            'offset': offset,
+            'limit': limit,
+            'unchanged_files': [
+                {'path': path, 'file': files1[path]} for path in page
+            ]
+        }
+
     def get_file_diff(self, project1_id: str, project2_id: str, file_path: str) -> Dict:
         """Get detailed diff for a specific file."""
         if project1_id not in self.projects or project2_id not in self.projects:
             raise ValueError("One or both projects not found")
-        
+
+        # Users flip back and forth between files in the diff UI; repeat
+        # requests come straight from the cache
+        cache_key = (project1_id, project2_id, file_path)
+        cached = self._diff_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         project1 = self.projects[project1_id]
         project2 = self.projects[project2_id]
-        
-        # Extract file contents from archives
-        content1 = self._extract_file_content(project1, file_path)
-        content2 = self._extract_file_content(project2, file_path)
-        
-        if content1 is None and content2 is None:
+
+        # The manifests already carry content hashes - if they match, the
+        # file is unchanged and neither tar needs to be touched
+        file1 = project1['manifest'].get('files', {}).get(file_path)
+        file2 = project2['manifest'].get('files', {}).get(file_path)
+        if file1 and file2 and file1.get('hash') and file1.get('hash') == file2.get('hash'):
+            size = file1.get('metadata', {}).get('size', 0)
+            result = {
+                'file_path': file_path,
+                'diff_type': 'unchanged',
+                'diff_html': '<div class="diff-empty">Files are identical</div>',
+                'diff_unified': '',
+                'content1_size': size,
+                'content2_size': size
+            }
+            self._diff_cache[cache_key] = result
+            return result
+
+        # Extract pre-split file lines from archives
+        extracted1 = self._extract_file_lines(project1, file_path)
+        extracted2 = self._extract_file_lines(project2, file_path)
+
+        if extracted1 is None and extracted2 is None:
             return {'error': 'File not found in either project'}
-        
+
         # Generate diff
-        if content1 is None:
-            diff_html = self._generate_diff_html([], content2.splitlines(), file_path)
+        if extracted1 is None:
+            lines1, size1 = [], 0
+            lines2, size2 = extracted2
             diff_type = 'added'
-        elif content2 is None:
-            diff_html = self._generate_diff_html(content1.splitlines(), [], file_path)
+        elif extracted2 is None:
+            lines1, size1 = extracted1
+            lines2, size2 = [], 0
             diff_type = 'deleted'
         else:
-            diff_html = self._generate_diff_html(content1.splitlines(), content2.splitlines(), file_path)
+            lines1, size1 = extracted1
+            lines2, size2 = extracted2
             diff_type = 'modified'
-        
-        return {
+
+        # Compute the hunks once; ship both the compact unified text (for
+        # client-side renderers) and the pre-rendered HTML
+        diff_lines = self._unified_diff_lines(lines1, lines2, file_path)
+        diff_html = self._render_diff_html(diff_lines)
+
+        result = {
             'file_path': file_path,
             'diff_type': diff_type,
             'diff_html': diff_html,
-            'content1_size': len(content1) if content1 else 0,
-            'content2_size': len(content2) if content2 else 0
+            'diff_unified': '\n'.join(diff_lines),
+            'content1_size': size1,
+            'content2_size': size2
         }
+        self._diff_cache[cache_key] = result
+        return result
     
+    def _extract_file_lines(self, project: Dict, file_path: str) -> Optional[Tuple[List[str], int]]:
+        """Get (lines, content size) for a file, splitting only once.
+
+        splitlines() on large text is O(size) allocator traffic; the split
+        result is cached per project so repeat diffs reuse it directly.
+        """
+        cache = project['line_cache']
+        if file_path in cache:
+            return cache[file_path]
+
+        content = self._extract_file_content(project, file_path)
+        if content is None:
+            return None
+
+        entry = (content.splitlines(), len(content))
+        cache[file_path] = entry
+        return entry
+
     def _extract_file_content(self, project: Dict, file_path: str) -> Optional[str]:
         """Extract file content from project archive."""
         try:
+            cache = project['content_cache']
+            if file_path in cache:
+                return cache[file_path]
+
             archive_path = f"archived_files{file_path}"
-            
-            with tarfile.open(project['tar_path'], 'r:*') as tar:
-                try:
-                    member = tar.getmember(archive_path)
-                    f = tar.extractfile(member)
-                    if f:
-                        content = f.read()
-                        # Try to decode as text
-                        try:
-                            return content.decode('utf-8')
-                        except UnicodeDecodeError:
-                            try:
-                                return content.decode('latin1')
-                            except UnicodeDecodeError:
-                                return f"<Binary file - {len(content)} bytes>"
-                except KeyError:
-                    return None
+
+            self._ensure_tar(project)
+            member = project['members'].get(archive_path)
+            if member is None:
+                return None
+
+            # TarFile objects are not thread-safe; serialize extraction per
+            # project so concurrent diffs of unrelated projects proceed in
+            # parallel
+            with self._tar_locks[project['id']]:
+                f = project['tar'].extractfile(member)
+                if f:
+                    # Sniff the first block for NUL bytes so binary members
+                    # are flagged without reading or decoding the whole file
+                    head = f.read(4096)
+                    if b'\x00' in head:
+                        text = f"<Binary file - {member.size} bytes>"
+                        cache[file_path] = text
+                        return text
+
+                    content = head + f.read()
+                    # One decode pass: anything that survived the NUL
+                    # sniff is treated as text, with undecodable bytes
+                    # shown as replacement characters instead of paying
+                    # for a second full decode under another codec
+                    text = content.decode('utf-8', errors='replace')
+                    cache[file_path] = text
+                    return text
         except Exception as e:
             logger.error(f"Error extracting file {file_path}: {e}")
             return None
     
-    def _generate_diff_html(self, lines1: List[str], lines2: List[str], filename: str) -> str:
-        """Generate HTML diff representation."""
-        differ = difflib.HtmlDiff()
-        return differ.make_file(
+    def _unified_diff_lines(self, lines1: List[str], lines2: List[str], filename: str) -> List[str]:
+        """Compute unified-diff hunks for two line lists.
+
+        Uses unified_diff instead of difflib.HtmlDiff, whose quadratic
+        table building stalls on multi-thousand-line files.
+        """
+        return list(difflib.unified_diff(
             lines1, lines2,
-            fromdesc=f"Before: {filename}",
-            todesc=f"After: {filename}",
-            context=True,
-            numlines=3
-        )
+            fromfile=f"Before: {filename}",
+            tofile=f"After: {filename}",
+            lineterm='',
+            n=3
+        ))
+
+    def _render_diff_html(self, diff_lines: List[str]) -> str:
+        """Render unified-diff lines as lightweight HTML."""
+        rendered = []
+        for line in diff_lines:
+            escaped = html.escape(line)
+            if line.startswith('+++') or line.startswith('---'):
+                rendered.append(f'<div class="diff-header">{escaped}</div>')
+            elif line.startswith('@@'):
+                rendered.append(f'<div class="diff-hunk">{escaped}</div>')
+            elif line.startswith('+'):
+                rendered.append(f'<div class="diff-add">{escaped}</div>')
+            elif line.startswith('-'):
+                rendered.append(f'<div class="diff-del">{escaped}</div>')
+            else:
+                rendered.append(f'<div class="diff-ctx">{escaped}</div>')
+
+        if not rendered:
+            return '<div class="diff-empty">Files are identical</div>'
+
+        return f'<div class="diff-container"><pre class="diff">{"".join(rendered)}</pre></div>'
     
     def cleanup_project(self, project_id: str):
-        """Clean up temporary files for a project."""
+        """Clean up resources for a project."""
         if project_id in self.projects:
-            project = self.projects[project_id]
-            if 'temp_dir' in project and os.path.exists(project['temp_dir']):
-                shutil.rmtree(project['temp_dir'])
+            self._close_project_tar(project_id)
+            self._invalidate_diff_cache(project_id)
             del self.projects[project_id]
             logger.info(f"Cleaned up project {project_id}")
     
@@ -351,34 +707,17 @@ class ProjectAnalyzer:
         
         project1 = self.projects[project1_id]
         project2 = self.projects[project2_id]
-        
-        manifest1 = project1['manifest']
-        manifest2 = project2['manifest']
-        
-        files1 = manifest1.get('files', {})
-        files2 = manifest2.get('files', {})
-        
-        # Find differences
-        all_paths = set(files1.keys()) | set(files2.keys())
-        
-        new_files = set()
-        deleted_files = set()
-        modified_files = set()
-        
-        for path in all_paths:
-            if path in files1 and path in files2:
-                # File exists in both - check if modified
-                file1 = files1[path]
-                file2 = files2[path]
-                
-                if file1.get('hash') != file2.get('hash'):
-                    modified_files.add(path)
-            elif path in files1:
-                # File deleted
-                deleted_files.add(path)
-            else:
-                # File added
-                new_files.add(path)
+
+        hashes1 = project1['hash_index']
+        hashes2 = project2['hash_index']
+
+        # Find differences via the precomputed path -> hash index
+        new_files = hashes2.keys() - hashes1.keys()
+        deleted_files = hashes1.keys() - hashes2.keys()
+        modified_files = {
+            path for path in hashes1.keys() & hashes2.keys()
+            if hashes1[path] != hashes2[path]
+        }
         
         # Generate file patterns for inclusion
         all_changed_files = new_files | deleted_files | modified_files
@@ -388,18 +727,23 @@ class ProjectAnalyzer:
         file_extensions = set()
         specific_files = set()
         
+        # Plain string ops instead of pathlib - three Path objects per
+        # changed file add up on large change sets
         for filepath in all_changed_files:
+            slash = filepath.rfind('/')
+            parent = filepath[:slash] if slash > 0 else ('/' if slash == 0 else '.')
+
             # Add directory
-            directories.add(str(Path(filepath).parent))
-            
+            directories.add(parent)
+
             # Add file extension
-            suffix = Path(filepath).suffix
-            if suffix:
-                file_extensions.add(f"*{suffix}")
-            
+            name = filepath[slash + 1:]
+            dot = name.rfind('.')
+            if dot > 0:
+                file_extensions.add(f"*{name[dot:]}")
+
             # Add specific filename patterns for config files
-            name = Path(filepath).name
-            if any(pattern in name.lower() for pattern in ['conf', 'config', 'cfg', 'ini', 'yaml', 'yml', 'json']):
+            if _CFG_RE.search(name):
                 specific_files.add(name)
         
         # Create targeted configuration
@@ -442,7 +786,7 @@ class ProjectAnalyzer:
                 "generated_from": {
                     "before_project": project1_id,
                     "after_project": project2_id,
-                    "generated_at": datetime.now().isoformat()
+                    "generated_at": _iso_now()
                 },
                 "changes_summary": {
                     "new_files": len(new_files),
@@ -457,20 +801,37 @@ class ProjectAnalyzer:
     
     def delete_project(self, project_id: str):
         """Delete a project and clean up resources."""
-        with self._lock:
+        # Same lock order as load_project: project lock first, then the
+        # global lock for the dict mutation
+        with self._project_locks[project_id], self._lock:
             if project_id in self.projects:
-                project = self.projects[project_id]
-                # Clean up temporary directory
-                temp_dir = project.get('temp_dir')
-                if temp_dir and os.path.exists(temp_dir):
-                    try:
-                        shutil.rmtree(temp_dir)
-                        logger.info(f"Cleaned up temp directory for project {project_id}")
-                    except Exception as e:
-                        logger.warning(f"Failed to clean up temp directory {temp_dir}: {e}")
-                
-                # Remove from projects dict
+                project_info = self.projects[project_id]
+
+                # Close tar handle, drop cached diffs, remove from projects dict
+                self._close_project_tar(project_id)
+                self._invalidate_diff_cache(project_id)
+                self._evict_export_cache(project_id, project_info.get('loaded_at'))
+                self._tar_locks.pop(project_id, None)
                 del self.projects[project_id]
+
+                # Drop the manifest sidecar along with the project
+                try:
+                    sidecar_path = self._manifest_sidecar_path(project_id)
+                    if os.path.exists(sidecar_path):
+                        os.remove(sidecar_path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove manifest sidecar for {project_id}: {e}")
+
+                # Drop the decompressed .tar _open_tar derived from a
+                # compressed upload - it is archive-sized and useless
+                # once the project is gone
+                tar_path = project_info.get('tar_path')
+                derived_path = self._derived_tar_path(tar_path) if tar_path else None
+                if derived_path and os.path.exists(derived_path):
+                    try:
+                        os.remove(derived_path)
+                    except OSError as e:
+                        logger.warning(f"Failed to remove derived tar for {project_id}: {e}")
                 
                 # Update cache
                 self._save_projects_cache()
@@ -479,32 +840,72 @@ class ProjectAnalyzer:
             else:
                 logger.warning(f"Attempted to delete non-existent project {project_id}")
     
+    def _evict_export_cache(self, project_id: str, loaded_at) -> None:
+        """Remove cached exports for pairs involving a deleted project.
+
+        Export cache files are keyed by ETag, which covers both project
+        ids and their loaded_at timestamps, so the stale files can be
+        recomputed and unlinked directly for every currently loaded
+        counterpart."""
+        for other_id, other_info in list(self.projects.items()):
+            other_at = other_info.get('loaded_at')
+            for p1, a1, p2, a2 in ((project_id, loaded_at, other_id, other_at),
+                                   (other_id, other_at, project_id, loaded_at)):
+                for format in ('json', 'csv'):
+                    etag = _export_etag(p1, a1, p2, a2, format)
+                    try:
+                        os.remove(os.path.join(EXPORT_CACHE_FOLDER, f"{etag}.{format}"))
+                    except OSError:
+                        pass
+
     def cleanup_stale_projects(self):
         """Remove projects whose tar files no longer exist."""
-        with self._lock:
-            stale_projects = []
-            for project_id, project_info in self.projects.items():
-                tar_path = project_info.get('tar_path')
-                if tar_path and not os.path.exists(tar_path):
-                    stale_projects.append(project_id)
-            
-            for project_id in stale_projects:
-                logger.info(f"Removing stale project {project_id}")
-                self.delete_project(project_id)
-            
-            if stale_projects:
-                logger.info(f"Cleaned up {len(stale_projects)} stale projects")
+        # Scan a snapshot without holding any lock; delete_project takes
+        # the project and global locks itself
+        stale_projects = [
+            project_id for project_id, project_info in list(self.projects.items())
+            if project_info.get('tar_path') and not os.path.exists(project_info['tar_path'])
+        ]
+
+        for project_id in stale_projects:
+            logger.info(f"Removing stale project {project_id}")
+            self.delete_project(project_id)
+
+        if stale_projects:
+            logger.info(f"Cleaned up {len(stale_projects)} stale projects")
 
 # Global analyzer instance
 analyzer = ProjectAnalyzer()
 
+# Background pool for asynchronous project loads. Uploads that pass
+# async=true get a 202 immediately and poll /api/upload/status/<job_id>
+# instead of holding a WSGI worker for the whole extraction.
+upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='upload')
+_upload_jobs = {}  # job_id -> [Future, finished-at monotonic time or None]
+_UPLOAD_JOB_TTL = 600  # seconds a finished job stays pollable
+
+def _prune_upload_jobs():
+    """Expire finished upload jobs after their grace period.
+
+    Finished jobs stay pollable for _UPLOAD_JOB_TTL so every poller
+    sees the terminal status, and jobs nobody ever polls cannot
+    accumulate forever. Called from the upload and status endpoints."""
+    now = time.monotonic()
+    for job_id, entry in list(_upload_jobs.items()):
+        if not entry[0].done():
+            continue
+        if entry[1] is None:
+            entry[1] = now
+        elif now - entry[1] > _UPLOAD_JOB_TTL:
+            _upload_jobs.pop(job_id, None)
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     if not filename or '.' not in filename:
         return False
     
-    # Check for .tar.gz files first
-    if filename.lower().endswith('.tar.gz'):
+    # Check for compound extensions first
+    if filename.lower().endswith(('.tar.gz', '.tar.zst')):
         return True
     
     # Check single extensions
@@ -514,7 +915,7 @@ def allowed_file(filename):
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return jsonify({'status': 'healthy', 'timestamp': _iso_now()})
 
 @app.before_request
 def before_request():
@@ -566,18 +967,35 @@ def upload_project():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{project_id}_{filename}")
         logger.info(f"Saving file to: {filepath}")
         
-        file.save(filepath)
+        # Copy the upload stream with a 1 MB buffer; werkzeug's default
+        # save() chunks are much smaller and cost more Python round-trips
+        with open(filepath, 'wb') as out:
+            shutil.copyfileobj(file.stream, out, length=1024 * 1024)
         logger.info(f"File saved successfully, size: {os.path.getsize(filepath)} bytes")
         
+        # Optionally hand the load off to the background pool so the
+        # request returns as soon as the bytes are on disk
+        if request.form.get('async', '').lower() in ('1', 'true', 'yes'):
+            _prune_upload_jobs()
+            job_id = f"{project_id}:{uuid.uuid4().hex[:8]}"
+            _upload_jobs[job_id] = [upload_executor.submit(
+                analyzer.load_project, project_id, filepath), None]
+            logger.info(f"Project {project_id} load submitted as job {job_id}")
+            return jsonify({
+                'message': 'Project upload accepted',
+                'job_id': job_id,
+                'status_url': f'/api/upload/status/{job_id}'
+            }), 202
+
         # Load project
         project_summary = analyzer.load_project(project_id, filepath)
         logger.info(f"Project {project_id} loaded successfully")
-        
+
         return jsonify({
             'message': 'Project uploaded successfully',
             'project': project_summary
         })
-    
+
     except ValueError as e:
         logger.error(f"Validation error uploading project {project_id}: {e}")
         return jsonify({'error': str(e)}), 400
@@ -585,6 +1003,27 @@ def upload_project():
         logger.error(f"Unexpected error uploading project {project_id}: {e}")
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+@app.route('/api/upload/status/<job_id>', methods=['GET'])
+def upload_status(job_id):
+    """Poll the status of a background project load."""
+    _prune_upload_jobs()
+    entry = _upload_jobs.get(job_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown job id'}), 404
+
+    future = entry[0]
+    if not future.done():
+        return jsonify({'job_id': job_id, 'status': 'loading'})
+
+    # Terminal status is idempotent: the job stays registered for the
+    # grace period so concurrent pollers all see the same answer
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Background load {job_id} failed: {error}")
+        return jsonify({'job_id': job_id, 'status': 'failed', 'error': str(error)}), 500
+
+    return jsonify({'job_id': job_id, 'status': 'loaded', 'project': future.result()})
+
 @app.route('/api/projects', methods=['GET'])
 def list_projects():
     """List all loaded projects."""
@@ -616,7 +1055,7 @@ def list_projects():
             return jsonify({
                 'projects': projects,
                 'total_count': len(projects),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': _iso_now()
             })
     
     except Exception as e:
@@ -661,6 +1100,20 @@ def compare_projects(project1_id, project2_id):
         logger.error(f"Unexpected error comparing projects {project1_id} vs {project2_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/compare/<project1_id>/<project2_id>/unchanged', methods=['GET'])
+def get_unchanged_files(project1_id, project2_id):
+    """Get a paginated list of files unchanged between two projects."""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', 100, type=int)
+        result = analyzer.get_unchanged_files(project1_id, project2_id, offset, limit)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error listing unchanged files for {project1_id} vs {project2_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/diff/<project1_id>/<project2_id>', methods=['POST'])
 def get_file_diff(project1_id, project2_id):
     """Get diff for a specific file."""
@@ -684,84 +1137,199 @@ def export_comparison(project1_id, project2_id, format):
     """Export comparison results."""
     if format not in ['csv', 'json']:
         return jsonify({'error': 'Invalid format. Use csv or json'}), 400
-    
+
     try:
+        # Exports are a pure function of the two immutable projects, so a
+        # stable ETag lets clients revalidate and repeat downloads come
+        # straight from the on-disk export cache
+        project1 = analyzer.projects.get(project1_id)
+        project2 = analyzer.projects.get(project2_id)
+        if project1 is None or project2 is None:
+            return jsonify({'error': 'One or both projects not found'}), 404
+        loaded_at1 = project1['loaded_at']
+        loaded_at2 = project2['loaded_at']
+
+        etag = _export_etag(project1_id, loaded_at1, project2_id, loaded_at2, format)
+
+        if request.headers.get('If-None-Match', '').strip('"') == etag:
+            return app.response_class(status=304, headers={'ETag': etag})
+
+        mimetype = 'application/json' if format == 'json' else 'text/csv'
+        download_name = f'comparison_{project1_id}_{project2_id}.{format}'
+        cache_path = os.path.join(EXPORT_CACHE_FOLDER, f"{etag}.{format}")
+
+        if os.path.exists(cache_path):
+            return send_file(cache_path, mimetype=mimetype, as_attachment=True,
+                             download_name=download_name, conditional=True, etag=etag)
+
         comparison = analyzer.compare_projects(project1_id, project2_id)
-        
+
         if format == 'json':
-            # Return JSON export
-            response = app.response_class(
-                response=json.dumps(comparison, indent=2),
-                status=200,
-                mimetype='application/json'
-            )
-            response.headers['Content-Disposition'] = f'attachment; filename=comparison_{project1_id}_{project2_id}.json'
-            return response
-        
+            # Write-through to the export cache, then serve the file.
+            # mkstemp gives each request its own temp file, so two
+            # concurrent first-time exports cannot interleave writes
+            data = _json_dumps_indented(comparison)
+            fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_FOLDER)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            os.replace(tmp_path, cache_path)
+            return send_file(cache_path, mimetype=mimetype, as_attachment=True,
+                             download_name=download_name, conditional=True, etag=etag)
+
         elif format == 'csv':
-            # Generate CSV export
-            import io
+            # Stream CSV rows as they are produced instead of buffering the
+            # whole export in memory
             import csv
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow(['Change Type', 'File Path', 'Size Before', 'Size After', 'Hash Before', 'Hash After'])
-            
-            # Write data
-            for change_type, files in comparison['changes'].items():
-                for file_info in files:
-                    if change_type == 'modified_files':
-                        writer.writerow([
-                            'Modified',
-                            file_info['path'],
-                            file_info['before']['metadata'].get('size', ''),
-                            file_info['after']['metadata'].get('size', ''),
-                            file_info['before'].get('hash', ''),
-                            file_info['after'].get('hash', '')
-                        ])
-                    elif change_type == 'new_files':
-                        writer.writerow([
-                            'Added',
-                            file_info['path'],
-                            '',
-                            file_info['file']['metadata'].get('size', ''),
-                            '',
-                            file_info['file'].get('hash', '')
-                        ])
-                    elif change_type == 'deleted_files':
-                        writer.writerow([
-                            'Deleted',
-                            file_info['path'],
-                            file_info['file']['metadata'].get('size', ''),
-                            '',
-                            file_info['file'].get('hash', ''),
-                            ''
-                        ])
-            
+
+            class Echo:
+                """Write proxy that hands each value straight back to
+                csv.writer, avoiding a StringIO seek/truncate per row."""
+
+                def write(self, value):
+                    return value
+
+            def generate():
+                writer = csv.writer(Echo())
+                # Per-request temp file: concurrent first-time exports
+                # each write their own copy and race only on the final
+                # atomic rename
+                fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_FOLDER)
+                cache_file = os.fdopen(fd, 'w', newline='')
+                completed = False
+
+                def flush_row(row):
+                    value = writer.writerow(row)
+                    cache_file.write(value)
+                    return value
+
+                try:
+                    # Header
+                    yield flush_row(['Change Type', 'File Path', 'Size Before', 'Size After', 'Hash Before', 'Hash After'])
+
+                    # Data
+                    for change_type, files in comparison['changes'].items():
+                        for file_info in files:
+                            if change_type == 'modified_files':
+                                yield flush_row([
+                                    'Modified',
+                                    file_info['path'],
+                                    file_info['before']['metadata'].get('size', ''),
+                                    file_info['after']['metadata'].get('size', ''),
+                                    file_info['before'].get('hash', ''),
+                                    file_info['after'].get('hash', '')
+                                ])
+                            elif change_type == 'new_files':
+                                yield flush_row([
+                                    'Added',
+                                    file_info['path'],
+                                    '',
+                                    file_info['file']['metadata'].get('size', ''),
+                                    '',
+                                    file_info['file'].get('hash', '')
+                                ])
+                            elif change_type == 'deleted_files':
+                                yield flush_row([
+                                    'Deleted',
+                                    file_info['path'],
+                                    file_info['file']['metadata'].get('size', ''),
+                                    '',
+                                    file_info['file'].get('hash', ''),
+                                    ''
+                                ])
+                    completed = True
+                finally:
+                    # Only completed exports land in the cache; an
+                    # aborted stream (GeneratorExit on client
+                    # disconnect) closes the fd and drops the partial
+                    # file
+                    cache_file.close()
+                    if completed:
+                        os.replace(tmp_path, cache_path)
+                    else:
+                        try:
+                            os.unlink(tmp_path)
+                        except OSError:
+                            pass
+
             response = app.response_class(
-                response=output.getvalue(),
+                response=stream_with_context(generate()),
                 status=200,
-                mimetype='text/csv'
+                mimetype=mimetype
             )
-            response.headers['Content-Disposition'] = f'attachment; filename=comparison_{project1_id}_{project2_id}.csv'
+            response.headers['ETag'] = etag
+            response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
             return response
     
     except Exception as e:
         logger.error(f"Error exporting comparison: {e}")
         return jsonify({'error': str(e)}), 500
 
+_YAML_PLAIN_KEY_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _yaml_scalar(value) -> str:
+    """Render one scalar; strings are single-quoted, which is always safe."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    raise ValueError(f"unexpected scalar in config: {value!r}")
+
+def _emit_yaml_node(node: Dict, indent: int, lines: List[str]):
+    pad = '  ' * indent
+    for key, value in node.items():
+        if not isinstance(key, str) or not _YAML_PLAIN_KEY_RE.match(key):
+            raise ValueError(f"unexpected key in config: {key!r}")
+        if isinstance(value, dict):
+            if value:
+                lines.append(f"{pad}{key}:")
+                _emit_yaml_node(value, indent + 1, lines)
+            else:
+                lines.append(f"{pad}{key}: {{}}")
+        elif isinstance(value, list):
+            if value:
+                lines.append(f"{pad}{key}:")
+                for item in value:
+                    lines.append(f"{pad}- {_yaml_scalar(item)}")
+            else:
+                lines.append(f"{pad}{key}: []")
+        else:
+            lines.append(f"{pad}{key}: {_yaml_scalar(value)}")
+
+def _mode2_config_yaml(config: Dict) -> str:
+    """Emit a Mode 2 config as YAML without the generic dumper.
+
+    The schema is fixed - nested dicts of scalars and string lists - so
+    a direct emitter skips PyYAML's representer machinery on this
+    synchronous response path. Anything outside the expected shape
+    falls back to yaml.dump.
+    """
+    try:
+        lines = []
+        _emit_yaml_node(config, 0, lines)
+        return '\n'.join(lines) + '\n'
+    except ValueError:
+        import yaml
+        try:
+            from yaml import CSafeDumper as _Dumper
+        except ImportError:
+            from yaml import SafeDumper as _Dumper
+        return yaml.dump(config, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+
 @app.route('/api/generate-config/<project1_id>/<project2_id>', methods=['GET'])
 def generate_mode2_config(project1_id, project2_id):
     """Generate Mode 2 configuration from two Mode 1 projects."""
     try:
         config = analyzer.generate_mode2_config(project1_id, project2_id)
-        
+
         # Convert to YAML format for download
-        import yaml
-        yaml_content = yaml.dump(config, default_flow_style=False, sort_keys=False)
-        
+        yaml_content = _mode2_config_yaml(config)
+
         response = app.response_class(
             response=yaml_content,
             status=200,
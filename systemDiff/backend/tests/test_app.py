@@ -9,13 +9,14 @@ import os
 import shutil
 import json
 import tarfile
+import time
 from pathlib import Path
 import sys
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from app import app, analyzer, ProjectAnalyzer
+from app import app, analyzer, ProjectAnalyzer, _upload_jobs
 
 class TestProjectAnalyzer(unittest.TestCase):
     """Test cases for ProjectAnalyzer class."""
@@ -173,11 +174,55 @@ class TestFlaskAPI(unittest.TestCase):
         """Set up test environment."""
         self.app = app.test_client()
         self.app.testing = True
-        
-        # Clear global analyzer
+        self.test_dir = tempfile.mkdtemp()
+
+        # Clear global analyzer and any leftover background jobs
         global analyzer
         analyzer.projects.clear()
-    
+        _upload_jobs.clear()
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.test_dir)
+
+    def _create_project_archive(self, project_name):
+        """Create a minimal project tar.gz and return its path."""
+        manifest = {
+            "metadata": {
+                "version": "1.0",
+                "created": "2025-01-15T10:00:00",
+                "hostname": "test-host",
+                "platform": "Linux"
+            },
+            "files": {
+                "/test/file1.txt": {
+                    "path": "/test/file1.txt",
+                    "metadata": {"size": 100, "mode": "0o644"},
+                    "hash": "hash1",
+                    "archived": False
+                },
+                "/test/file2.txt": {
+                    "path": "/test/file2.txt",
+                    "metadata": {"size": 200, "mode": "0o644"},
+                    "hash": "hash2" if project_name == "project1" else "hash2_modified",
+                    "archived": False
+                }
+            },
+            "directories": {},
+            "errors": []
+        }
+
+        project_dir = os.path.join(self.test_dir, project_name)
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, "manifest.json"), 'w') as f:
+            json.dump(manifest, f)
+
+        tar_path = os.path.join(self.test_dir, f"{project_name}.tar.gz")
+        with tarfile.open(tar_path, "w:gz") as tar:
+            tar.add(project_dir, arcname="", recursive=True)
+
+        return tar_path
+
     def test_health_check(self):
         """Test health check endpoint."""
         response = self.app.get('/api/health')
@@ -221,6 +266,80 @@ class TestFlaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
     
+    def test_unchanged_files_endpoint(self):
+        """Unchanged files are listed with pagination metadata."""
+        analyzer.load_project("test1", self._create_project_archive("project1"))
+        analyzer.load_project("test2", self._create_project_archive("project2"))
+
+        response = self.app.get('/api/compare/test1/test2/unchanged')
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertEqual(data['project1'], 'test1')
+        self.assertEqual(data['project2'], 'test2')
+        # file1.txt shares its hash, file2.txt differs
+        self.assertEqual(data['total_count'], 1)
+        self.assertEqual(data['unchanged_files'][0]['path'], '/test/file1.txt')
+
+        # Pagination: an offset past the end returns an empty page but
+        # the same total
+        response = self.app.get('/api/compare/test1/test2/unchanged?offset=1&limit=10')
+        data = json.loads(response.data)
+        self.assertEqual(data['total_count'], 1)
+        self.assertEqual(data['unchanged_files'], [])
+        self.assertEqual(data['offset'], 1)
+
+    def test_unchanged_files_missing_project(self):
+        """Unknown projects return 404 from the unchanged endpoint."""
+        response = self.app.get('/api/compare/nope1/nope2/unchanged')
+        self.assertEqual(response.status_code, 404)
+
+        data = json.loads(response.data)
+        self.assertIn('error', data)
+
+    def test_async_upload_and_status(self):
+        """Async uploads return 202 and report terminal status idempotently."""
+        tar_path = self._create_project_archive("project1")
+        with open(tar_path, 'rb') as f:
+            response = self.app.post('/api/upload', data={
+                'file': (f, 'project1.tar.gz'),
+                'project_id': 'async_test',
+                'async': 'true'
+            }, content_type='multipart/form-data')
+
+        self.assertEqual(response.status_code, 202)
+        data = json.loads(response.data)
+        self.assertIn('job_id', data)
+        status_url = data['status_url']
+
+        # Poll until the background load finishes
+        for _ in range(100):
+            response = self.app.get(status_url)
+            if json.loads(response.data).get('status') != 'loading':
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.data)
+        self.assertEqual(payload['status'], 'loaded')
+        self.assertEqual(payload['project']['id'], 'async_test')
+        self.assertIn('async_test', analyzer.projects)
+
+        # A second poll must see the same terminal status, not a 404
+        response = self.app.get(status_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['status'], 'loaded')
+
+        analyzer.delete_project('async_test')
+
+    def test_upload_status_unknown_job(self):
+        """Polling an unknown job id returns 404."""
+        response = self.app.get('/api/upload/status/nope:00000000')
+        self.assertEqual(response.status_code, 404)
+
+        data = json.loads(response.data)
+        self.assertIn('error', data)
+
     def test_export_invalid_format(self):
         """Test export with invalid format."""
         response = self.app.get('/api/export/proj1/proj2/invalid')
@@ -230,5 +349,61 @@ class TestFlaskAPI(unittest.TestCase):
         self.assertIn('error', data)
 
 
+class TestMode2ConfigYaml(unittest.TestCase):
+    """Round-trip checks for the hand-rolled mode 2 config emitter."""
+
+    def test_round_trip_through_safe_load(self):
+        """Emitter output parses back to the exact input structure."""
+        import yaml
+        from app import _mode2_config_yaml
+
+        config = {
+            'logging': {'level': 'INFO'},
+            'paths': {
+                'scan': ['/etc/nginx', '/opt/app'],
+                'include': ['*.conf', "o'brien.cfg", 'key: value.ini'],
+                'exclude': []
+            },
+            'archive': {
+                'max_file_size': 104857600,
+                'patterns': ['*.conf']
+            },
+            'performance': {
+                'worker_threads': 4,
+                'hash_chunk_size': 65536,
+                'max_files': 0
+            },
+            'mode2_metadata': {
+                'generated_from': {
+                    'before_project': 'before',
+                    'after_project': 'after',
+                    'generated_at': '2025-01-15T10:00:00'
+                },
+                'changes_summary': {
+                    'new_files': 1,
+                    'deleted_files': 0,
+                    'modified_files': 2,
+                    'total_changes': 3
+                }
+            }
+        }
+
+        self.assertEqual(yaml.safe_load(_mode2_config_yaml(config)), config)
+
+    def test_unexpected_shapes_fall_back_to_yaml_dump(self):
+        """Out-of-schema values still produce parseable YAML."""
+        import yaml
+        from app import _mode2_config_yaml
+
+        # Tuple values and non-identifier keys are outside the fixed
+        # schema the emitter handles
+        config = {'weird key': {'items': (1, 2)}, 'flag': True}
+
+        self.assertEqual(
+            yaml.safe_load(_mode2_config_yaml(config)),
+            {'weird key': {'items': [1, 2]}, 'flag': True}
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,9 +6,14 @@ Creates system fingerprints by analyzing files and directories,
 generating hashes, and archiving selected files into a tar project file.
 """
 
+import io
 import os
+import re
+import mmap
 import sys
+import shutil
 import argparse
+import subprocess
 import logging
 import hashlib
 import tarfile
@@ -16,10 +21,174 @@ import json
 import yaml
 import time
 import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+try:
+    # libyaml C bindings - several times faster than the pure-Python
+    # parser/emitter when PyYAML was built against libyaml
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Per-thread scratch space for the chunked hash fallback, so the hash
+# pool reuses one buffer per worker instead of allocating per file
+_thread_local = threading.local()
+
+try:
+    # Optional SIMD-parallel hash, several times faster than SHA-256 on
+    # large files; enabled via performance.hash_algorithm: blake3
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+@dataclass(slots=True)
+class _FileEntry:
+    """In-memory manifest entry for one scanned file.
+
+    A slotted dataclass instead of a per-file dict: on scans with
+    hundreds of thousands of files the outer dict overhead alone runs
+    to tens of MB. Serializes to the same nested JSON shape the
+    manifest has always used.
+    """
+    path: str
+    metadata: Dict
+    hash: str = ""
+    archived: bool = False
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": self.path,
+            "metadata": self.metadata,
+            "hash": self.hash,
+            "archived": self.archived
+        }
+
+
+def _json_default(obj):
+    if isinstance(obj, _FileEntry):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes, via orjson when available."""
+    if orjson is not None:
+        # orjson serializes dataclasses natively, in field order
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def _translate_glob_component(component: str) -> str:
+    """Translate one glob path component to a regex fragment.
+
+    Unlike fnmatch.translate, '*' and '?' never cross a '/' boundary,
+    matching how Path.match treats components.
+    """
+    out = []
+    i = 0
+    while i < len(component):
+        c = component[i]
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < len(component) and component[j] == '!':
+                j += 1
+            if j < len(component) and component[j] == ']':
+                j += 1
+            while j < len(component) and component[j] != ']':
+                j += 1
+            if j >= len(component):
+                out.append('\\[')
+            else:
+                inner = component[i + 1:j].replace('\\', '\\\\')
+                if inner.startswith('!'):
+                    inner = '^' + inner[1:]
+                out.append(f'[{inner}]')
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def _match_pattern_source(pattern: str) -> str:
+    """Regex source for one glob pattern, with Path.match semantics.
+
+    Relative patterns match the trailing components of a path (e.g.
+    '*.txt' matches '/any/dir/file.txt'); absolute patterns must match
+    the whole path.
+    """
+    absolute = pattern.startswith('/')
+    components = [c for c in pattern.split('/') if c]
+    body = '/'.join(_translate_glob_component(c) for c in components)
+    if absolute:
+        return r'\A/' + body + r'\Z'
+    return r'(?:\A|/)' + body + r'\Z'
+
+
+_GLOB_CHARS_RE = re.compile(r'[*?\[]')
+
+# Filename fragments that mark likely configuration files; one compiled
+# scan replaces a per-name loop of substring checks ('config' is covered
+# by 'conf')
+_CFG_RE = re.compile(r'conf|cfg|ini|yaml|yml|json', re.IGNORECASE)
+
+
+class _PatternSet:
+    """Compiled form of one glob pattern list.
+
+    Literal patterns (no wildcards) are answered with a set lookup or a
+    single endswith against a suffix tuple; wildcard patterns fold into
+    one regex alternation, so the engine scans the path once however
+    many patterns are configured. Semantics match Path.match per
+    pattern.
+    """
+    __slots__ = ('_exact', '_suffixes', '_regex')
+
+    def __init__(self, patterns: List[str]):
+        exact = set()
+        suffixes = []
+        sources = []
+        for pattern in patterns:
+            if _GLOB_CHARS_RE.search(pattern):
+                sources.append(_match_pattern_source(pattern))
+            elif pattern.startswith('/'):
+                exact.add(pattern.rstrip('/'))
+            else:
+                # Relative literal: the whole path, or its trailing
+                # components
+                stripped = pattern.strip('/')
+                exact.add(stripped)
+                suffixes.append('/' + stripped)
+        self._exact = exact
+        self._suffixes = tuple(suffixes)
+        self._regex = re.compile('|'.join(sources)) if sources else None
+
+    def __bool__(self):
+        return bool(self._exact or self._suffixes or self._regex)
+
+    def matches(self, path: str) -> bool:
+        if path in self._exact:
+            return True
+        if self._suffixes and path.endswith(self._suffixes):
+            return True
+        return self._regex is not None and self._regex.search(path) is not None
+
+
 class SystemRecorder:
     """Main class for system recording functionality."""
     
@@ -39,7 +208,15 @@ class SystemRecorder:
         
         # Setup logging
         self._setup_logging()
-        
+
+        # Fingerprint algorithm: sha256 (default) or blake3 when the
+        # package is installed
+        self._hash_algorithm = (self.config or {}).get('performance', {}).get('hash_algorithm', 'sha256')
+        if self._hash_algorithm == 'blake3' and blake3 is None:
+            self.logger.warning("blake3 requested but not installed - falling back to sha256")
+            self._hash_algorithm = 'sha256'
+
+
         # Log Docker environment detection
         if self.is_docker:
             self.logger.info("Docker environment detected - mapping paths to /system mount")
@@ -52,12 +229,53 @@ class SystemRecorder:
                 "hostname": os.uname().nodename,
                 "platform": os.uname().sysname,
                 "config_file": config_path,
-                "mode": mode
+                "mode": mode,
+                "hash_algorithm": self._hash_algorithm
             },
             "files": {},
             "directories": {},
             "errors": []
         }
+
+        # Hashing runs on a thread pool while the walk is still in
+        # progress; record_system owns the executor's lifetime
+        self._hash_executor = None
+        self._hash_futures = []
+        self._hashes_reused = 0
+
+        # Small archived files keep their bytes from the hashing read so
+        # the tar writer does not read them a second time; the budget
+        # bounds RSS and large files simply stream twice
+        self._archive_retain_max = 4 * 1024 * 1024
+        self._archive_bytes = {}
+        self._archive_bytes_budget = 64 * 1024 * 1024
+        self._archive_bytes_lock = threading.Lock()
+
+        # Hashes from prior runs, keyed by path with (mtime, size, inode)
+        # as a cheap change fingerprint - unchanged files skip re-hashing
+        self._hash_cache = self._load_hash_cache()
+
+        # Precompile include/exclude/archive globs once; Path.match
+        # re-parses the pattern on every call, which multiplies out to
+        # patterns x files over a full scan
+        paths_config = self.config.get('paths', {}) if self.config else {}
+        self._include_matchers = self._compile_patterns(paths_config.get('include', []))
+        self._exclude_matchers = self._compile_patterns(paths_config.get('exclude', []))
+        archive_config = self.config.get('archive', {}) if self.config else {}
+        self._archive_matchers = self._compile_patterns(
+            archive_config.get('patterns', ['*']), map_for_docker=False)
+
+        # Hoist per-file config lookups out of the hot predicates - the
+        # nested .get chains add up over millions of paths
+        self._max_archive_size = archive_config.get('max_file_size', 100 * 1024 * 1024)  # 100MB default
+        performance_config = self.config.get('performance', {}) if self.config else {}
+        self._hash_chunk_size = performance_config.get('hash_chunk_size', 1 << 20)
+
+    def _compile_patterns(self, patterns: List[str], map_for_docker: bool = True) -> _PatternSet:
+        """Compile glob patterns to a matcher, Docker-mapped where needed."""
+        if map_for_docker:
+            patterns = [self._map_pattern_for_docker(pattern) for pattern in patterns]
+        return _PatternSet(patterns)
     
     def _detect_docker_environment(self) -> bool:
         """Detect if running inside a Docker container."""
@@ -109,7 +327,7 @@ class SystemRecorder:
         """Load configuration from YAML file."""
         try:
             with open(self.config_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader)
         except Exception as e:
             print(f"Error loading config file {self.config_path}: {e}")
             sys.exit(1)
@@ -131,62 +349,53 @@ class SystemRecorder:
     
     def _should_include_path(self, path: str) -> bool:
         """Check if a path should be included based on configuration and mode."""
-        path_obj = Path(path)
-        
         # Mode 1: Broader scope - only exclude patterns matter
         if self.mode == 1:
-            # Check exclusion patterns
-            exclude_patterns = self.config.get('paths', {}).get('exclude', [])
-            if exclude_patterns:
-                # Map patterns for Docker environment
-                mapped_patterns = [self._map_pattern_for_docker(pattern) for pattern in exclude_patterns]
-                excluded = any(path_obj.match(pattern) for pattern in mapped_patterns)
-                if excluded:
-                    return False
-            return True
-        
+            return not self._exclude_matchers.matches(path)
+
         # Mode 2: Use both include and exclude patterns for targeted scanning
         if self.mode == 2:
             # Check inclusion patterns
-            include_patterns = self.config.get('paths', {}).get('include', [])
-            if include_patterns:
-                # Map patterns for Docker environment
-                mapped_patterns = [self._map_pattern_for_docker(pattern) for pattern in include_patterns]
-                included = any(path_obj.match(pattern) for pattern in mapped_patterns)
-                if not included:
-                    return False
-            
+            if self._include_matchers and not self._include_matchers.matches(path):
+                return False
+
             # Check exclusion patterns
-            exclude_patterns = self.config.get('paths', {}).get('exclude', [])
-            if exclude_patterns:
-                # Map patterns for Docker environment
-                mapped_patterns = [self._map_pattern_for_docker(pattern) for pattern in exclude_patterns]
-                excluded = any(path_obj.match(pattern) for pattern in mapped_patterns)
-                if excluded:
-                    return False
-        
+            if self._exclude_matchers.matches(path):
+                return False
+
         return True
-    
+
     def _should_archive_file(self, path: str, size: int) -> bool:
         """Check if a file should be archived based on configuration and mode."""
         # Mode 1: No archiving - only fingerprinting
         if self.mode == 1:
             return False
-        
+
         # Mode 2: Archive based on configuration
         if self.mode == 2:
             # Check file size limit
-            max_size = self.config.get('archive', {}).get('max_file_size', 100 * 1024 * 1024)  # 100MB default
-            if size > max_size:
+            if size > self._max_archive_size:
                 return False
-            
+
             # Check archive patterns
-            archive_patterns = self.config.get('archive', {}).get('patterns', ['*'])
-            path_obj = Path(path)
-            return any(path_obj.match(pattern) for pattern in archive_patterns)
-        
+            return self._archive_matchers.matches(path)
+
         return False
     
+    def _new_hasher(self, whole_buffer: bool = False):
+        """Create a hasher for the configured fingerprint algorithm.
+
+        whole_buffer signals that the caller hashes one large buffer in
+        a single update; blake3 can then split the work across its own
+        internal threads, which only pays off above its chunk-tree fan-
+        out and would just add overhead on small incremental updates.
+        """
+        if self._hash_algorithm == 'blake3':
+            if whole_buffer:
+                return blake3.blake3(max_threads=blake3.blake3.AUTO)
+            return blake3.blake3()
+        return hashlib.sha256()
+
     def _calculate_hash(self, filepath: str) -> str:
         """Calculate SHA256 hash of a file."""
         try:
@@ -194,20 +403,65 @@ class SystemRecorder:
             if os.path.islink(filepath):
                 # For symbolic links, hash the target path, not the file content
                 target = os.readlink(filepath)
-                sha256_hash = hashlib.sha256()
-                sha256_hash.update(target.encode('utf-8'))
-                return f"symlink:{sha256_hash.hexdigest()}"
+                hasher = self._new_hasher()
+                hasher.update(target.encode('utf-8'))
+                return f"symlink:{hasher.hexdigest()}"
             
             # Handle regular files
             if not os.path.isfile(filepath):
                 return ""
             
-            sha256_hash = hashlib.sha256()
-            with open(filepath, "rb") as f:
-                chunk_size = self.config.get('performance', {}).get('hash_chunk_size', 4096)
-                for chunk in iter(lambda: f.read(chunk_size), b""):
-                    sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
+            # buffering=0 skips the BufferedReader layer; both file_digest
+            # and readinto manage their own chunking
+            with open(filepath, "rb", buffering=0) as f:
+                fd = f.fileno()
+                # Sequential advice turns on aggressive readahead so
+                # prefetch overlaps with digesting, and WILLNEED starts
+                # the first window loading immediately; DONTNEED on the
+                # way out keeps a full-system scan from evicting the
+                # rest of the page cache
+                fadvise = getattr(os, 'posix_fadvise', None)
+                if fadvise is not None:
+                    fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                try:
+                    # Map large files and hash the whole mapping in one C
+                    # call - no chunking loop at all; hashlib releases the
+                    # GIL over the buffer, so this also plays well with the
+                    # parallel hash pool
+                    if os.fstat(fd).st_size > (1 << 20):
+                        try:
+                            with mmap.mmap(fd, 0, prot=mmap.PROT_READ) as mapped:
+                                if hasattr(mapped, 'madvise'):
+                                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                                hasher = self._new_hasher(whole_buffer=True)
+                                hasher.update(mapped)
+                                return hasher.hexdigest()
+                        except (OSError, ValueError):
+                            # Some files (procfs, device nodes) cannot be
+                            # mapped - fall through to the read loop
+                            pass
+
+                    # file_digest (3.11+) runs the whole read/update loop in C
+                    if self._hash_algorithm == 'sha256' and hasattr(hashlib, 'file_digest'):
+                        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+                    # Fallback: readinto the thread's reusable buffer so no
+                    # bytes object is allocated per chunk and no buffer per
+                    # file
+                    hasher = self._new_hasher()
+                    chunk_size = self._hash_chunk_size
+                    buffer = getattr(_thread_local, 'hash_buffer', None)
+                    if buffer is None or len(buffer) < chunk_size:
+                        buffer = bytearray(chunk_size)
+                        _thread_local.hash_buffer = buffer
+                    view = memoryview(buffer)
+                    while n := f.readinto(view):
+                        hasher.update(view[:n])
+                    return hasher.hexdigest()
+                finally:
+                    if fadvise is not None:
+                        fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
             
         except (OSError, IOError) as e:
             self.logger.warning(f"Could not calculate hash for {filepath}: {e}")
@@ -220,43 +474,36 @@ class SystemRecorder:
     def _get_file_metadata(self, filepath: str) -> Dict:
         """Get file metadata including permissions, ownership, and timestamps."""
         try:
-            # Use lstat for symbolic links to avoid following broken links
-            # Use stat for regular files to get proper metadata
-            is_symlink = os.path.islink(filepath)
-            
-            if is_symlink:
-                # For symbolic links, use lstat to get link metadata, not target
-                stat_info = os.lstat(filepath)
-                # Try to get target information safely
-                try:
-                    target = os.readlink(filepath)
-                    target_exists = os.path.exists(filepath)  # This follows the link
-                except (OSError, ValueError):
-                    target = None
-                    target_exists = False
-            else:
-                stat_info = os.stat(filepath)
-                target = None
-                target_exists = True
-            
+            # One lstat covers everything: the type flags come from
+            # st_mode arithmetic instead of separate is* syscalls, and
+            # lstat never follows broken links
+            stat_info = os.lstat(filepath)
+            mode = stat_info.st_mode
+            is_symlink = stat.S_ISLNK(mode)
+
             metadata = {
                 "size": stat_info.st_size,
-                "mode": oct(stat_info.st_mode),
+                "mode": oct(mode),
                 "uid": stat_info.st_uid,
                 "gid": stat_info.st_gid,
                 "mtime": stat_info.st_mtime,
                 "ctime": stat_info.st_ctime,
                 "atime": stat_info.st_atime,
+                "inode": stat_info.st_ino,
                 "is_symlink": is_symlink,
-                "is_directory": os.path.isdir(filepath) if not is_symlink else False,
-                "is_file": os.path.isfile(filepath) if not is_symlink else False
+                "is_directory": stat.S_ISDIR(mode),
+                "is_file": stat.S_ISREG(mode)
             }
-            
+
             # Add symlink-specific metadata
             if is_symlink:
-                metadata["symlink_target"] = target
-                metadata["symlink_target_exists"] = target_exists
-                
+                try:
+                    metadata["symlink_target"] = os.readlink(filepath)
+                    metadata["symlink_target_exists"] = os.path.exists(filepath)  # This follows the link
+                except (OSError, ValueError):
+                    metadata["symlink_target"] = None
+                    metadata["symlink_target_exists"] = False
+
             return metadata
             
         except (OSError, IOError, ValueError) as e:
@@ -270,6 +517,7 @@ class SystemRecorder:
                 "mtime": 0,
                 "ctime": 0,
                 "atime": 0,
+                "inode": 0,
                 "is_symlink": os.path.islink(filepath) if os.path.exists(filepath) else False,
                 "is_directory": False,
                 "is_file": False,
@@ -279,91 +527,288 @@ class SystemRecorder:
             self.logger.error(f"Unexpected error getting metadata for {filepath}: {e}")
             return {}
     
+    def _entry_metadata(self, entry: os.DirEntry) -> Dict:
+        """Build metadata from a DirEntry's cached stat information.
+
+        scandir fills type and stat data from the directory read, so the
+        common case costs one stat per entry instead of the four
+        stat-class syscalls _get_file_metadata makes on a bare path.
+        Symlinks still take the full path-based route for their
+        readlink/target fields.
+        """
+        try:
+            if entry.is_symlink():
+                return self._get_file_metadata(entry.path)
+
+            stat_info = entry.stat(follow_symlinks=False)
+            return {
+                "size": stat_info.st_size,
+                "mode": oct(stat_info.st_mode),
+                "uid": stat_info.st_uid,
+                "gid": stat_info.st_gid,
+                "mtime": stat_info.st_mtime,
+                "ctime": stat_info.st_ctime,
+                "atime": stat_info.st_atime,
+                "inode": stat_info.st_ino,
+                "is_symlink": False,
+                "is_directory": entry.is_dir(follow_symlinks=False),
+                "is_file": entry.is_file(follow_symlinks=False)
+            }
+        except (OSError, IOError, ValueError):
+            # Entry went away or stat failed - the path-based fallback
+            # produces the minimal error metadata
+            return self._get_file_metadata(entry.path)
+
     def _scan_directory(self, root_path: str) -> None:
         """Recursively scan directory and collect file information."""
         self.logger.info(f"Scanning directory: {root_path}")
-        
-        try:
-            for root, dirs, files in os.walk(root_path):
-                # Filter directories based on configuration
-                dirs[:] = [d for d in dirs if self._should_include_path(os.path.join(root, d))]
-                
-                # Process files
-                for file in files:
-                    filepath = os.path.join(root, file)
-                    
+
+        # Iterative scandir walk; DirEntry caches type/stat data from the
+        # directory read itself
+        stack = [root_path]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = os.scandir(current)
+            except OSError as e:
+                self.logger.error(f"Error scanning directory {current}: {e}")
+                self.manifest["errors"].append(f"Directory scan failed for {current}: {e}")
+                continue
+
+            with entries:
+                for entry in entries:
+                    filepath = entry.path
+
                     if not self._should_include_path(filepath):
                         continue
-                    
+
                     try:
-                        metadata = self._get_file_metadata(filepath)
+                        # is_dir() follows symlinks, matching how os.walk
+                        # classified symlinked directories (/bin, /lib on
+                        # merged-usr hosts) into dirnames; descending
+                        # through them is still skipped, as
+                        # followlinks=False did
+                        if entry.is_dir():
+                            metadata = self._entry_metadata(entry)
+                            if metadata:
+                                self.manifest["directories"][filepath] = {
+                                    "path": filepath,
+                                    "metadata": metadata
+                                }
+                            if not entry.is_symlink():
+                                stack.append(filepath)
+                            continue
+
+                        metadata = self._entry_metadata(entry)
                         if not metadata:
                             continue
-                        
-                        file_info = {
-                            "path": filepath,
-                            "metadata": metadata,
-                            "hash": self._calculate_hash(filepath) if (metadata.get("is_file") or metadata.get("is_symlink")) else "",
-                            "archived": False
-                        }
-                        
-                        # Check if file should be archived
+
+                        # Hashing starts on the worker pool as soon as the
+                        # walk discovers a file; _collect_hashes merges the
+                        # results into the manifest afterwards
+                        file_info = _FileEntry(path=filepath, metadata=metadata)
+
+                        # Check if file should be archived - before hash
+                        # submission, so the hashing read can retain the
+                        # payload for the tar writer
                         if metadata.get("is_file") and self._should_archive_file(filepath, metadata.get("size", 0)):
-                            file_info["archived"] = True
-                        
+                            file_info.archived = True
+
+                        if metadata.get("is_file") or metadata.get("is_symlink"):
+                            self._submit_hash(file_info)
+
                         self.manifest["files"][filepath] = file_info
-                        
+
                     except Exception as e:
                         self.logger.error(f"Error processing file {filepath}: {e}")
                         self.manifest["errors"].append(f"File processing failed for {filepath}: {e}")
-                
-                # Process directories
-                for directory in dirs:
-                    dirpath = os.path.join(root, directory)
-                    try:
-                        metadata = self._get_file_metadata(dirpath)
-                        if metadata:
-                            self.manifest["directories"][dirpath] = {
-                                "path": dirpath,
-                                "metadata": metadata
-                            }
-                    except Exception as e:
-                        self.logger.error(f"Error processing directory {dirpath}: {e}")
-                        self.manifest["errors"].append(f"Directory processing failed for {dirpath}: {e}")
-        
-        except Exception as e:
-            self.logger.error(f"Error scanning directory {root_path}: {e}")
-            self.manifest["errors"].append(f"Directory scan failed for {root_path}: {e}")
     
+    def _hash_cache_path(self) -> Path:
+        # One cache per algorithm: entries produced under a different
+        # performance.hash_algorithm must never be reused, or a rerun
+        # would mix old-algorithm digests into a manifest that claims
+        # the new one. sha256 keeps the historical name so existing
+        # caches stay valid.
+        if self._hash_algorithm == 'sha256':
+            return self.output_dir / "hash_cache.json"
+        return self.output_dir / f"hash_cache.{self._hash_algorithm}.json"
+
+    def _load_hash_cache(self) -> Dict:
+        """Load the hash sidecar cache written by a previous run."""
+        try:
+            cache_path = self._hash_cache_path()
+            if cache_path.exists():
+                with open(cache_path, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson is not None else json.loads(data)
+        except Exception as e:
+            self.logger.warning(f"Could not load hash cache: {e}")
+        return {}
+
+    def _save_hash_cache(self) -> None:
+        """Persist path -> (mtime, size, hash) for the next run."""
+        try:
+            with open(self._hash_cache_path(), 'wb') as f:
+                f.write(_json_dumps(self._hash_cache))
+        except Exception as e:
+            self.logger.warning(f"Could not save hash cache: {e}")
+
+    def _hash_workers(self) -> int:
+        return self.config.get('performance', {}).get('worker_threads', 0) or min(32, (os.cpu_count() or 4) * 2)
+
+    def _submit_hash(self, entry: _FileEntry) -> None:
+        """Queue a file for hashing, or reuse its cached hash.
+
+        Files whose (mtime, size) fingerprint matches the sidecar cache
+        take the previous hash without touching their contents; the rest
+        start hashing on the worker pool immediately, overlapping with
+        the rest of the directory walk.
+        """
+        metadata = entry.metadata
+        cached = self._hash_cache.get(entry.path)
+        if (cached and len(cached) == 4
+                and cached[0] == metadata.get("mtime")
+                and cached[1] == metadata.get("size")
+                and cached[2] == metadata.get("inode")):
+            entry.hash = cached[3]
+            self._hashes_reused += 1
+        elif self._hash_executor is not None:
+            self._hash_futures.append((entry, self._hash_executor.submit(self._hash_entry, entry)))
+        else:
+            # No pool running (e.g. _scan_directory called standalone)
+            self._store_hash(entry, self._hash_entry(entry))
+
+    def _hash_entry(self, entry: _FileEntry) -> str:
+        """Hash one entry, fusing the read with archiving where cheap.
+
+        Archived files get read again when the tar is written; small
+        ones are read whole here, hashed from the buffer, and the bytes
+        retained for the tar writer under a shared budget - one read,
+        two consumers. Anything over the per-file cap or past the budget
+        takes the normal streaming path and is re-read at archive time.
+        """
+        metadata = entry.metadata
+        size = metadata.get("size", 0)
+        if entry.archived and metadata.get("is_file") and 0 < size <= self._archive_retain_max:
+            with self._archive_bytes_lock:
+                reserved = self._archive_bytes_budget >= size
+                if reserved:
+                    self._archive_bytes_budget -= size
+            if reserved:
+                try:
+                    with open(entry.path, 'rb') as f:
+                        data = f.read()
+                    if len(data) == size:
+                        hasher = self._new_hasher()
+                        hasher.update(data)
+                        self._archive_bytes[entry.path] = data
+                        return hasher.hexdigest()
+                except (OSError, IOError):
+                    pass
+                # Read failed or the file changed size under us - give
+                # the budget back and let the normal path handle it
+                with self._archive_bytes_lock:
+                    self._archive_bytes_budget += size
+        return self._calculate_hash(entry.path)
+
+    def _store_hash(self, entry: _FileEntry, file_hash: str) -> None:
+        entry.hash = file_hash
+        # Failed hashes stay out of the cache so they are retried
+        if file_hash and not file_hash.startswith("error:"):
+            metadata = entry.metadata
+            self._hash_cache[entry.path] = [
+                metadata.get("mtime"), metadata.get("size"), metadata.get("inode"), file_hash]
+
+    def _collect_hashes(self) -> None:
+        """Merge completed hash futures into the manifest.
+
+        hashlib releases the GIL while digesting buffers, so the workers
+        genuinely overlapped hashing with the walk's scandir calls; the
+        merge itself stays single-threaded to keep the manifest free of
+        races.
+        """
+        if self._hashes_reused:
+            self.logger.info(f"Reused {self._hashes_reused} file hashes from cache")
+            self._hashes_reused = 0
+        for entry, future in self._hash_futures:
+            self._store_hash(entry, future.result())
+        self._hash_futures = []
+
+    def _add_archive_members(self, tar: tarfile.TarFile) -> None:
+        """Write the manifest and all archived files into an open tar."""
+        # Push the manifest bytes straight into the tar - no disk
+        # round-trip, and compact separators skip the pretty-printing
+        # cost on large manifests
+        manifest_data = _json_dumps(self.manifest)
+        manifest_info = tarfile.TarInfo("manifest.json")
+        manifest_info.size = len(manifest_data)
+        manifest_info.mtime = int(time.time())
+        tar.addfile(manifest_info, io.BytesIO(manifest_data))
+
+        # Add archived files. No exists() pre-check - the walk just saw
+        # these paths, and a file deleted since then surfaces as the
+        # FileNotFoundError the except already handles. The TarInfo is
+        # built from the metadata captured during the walk, so tar.add's
+        # internal re-stat is skipped too.
+        for filepath, file_info in self.manifest["files"].items():
+            if file_info.archived:
+                try:
+                    metadata = file_info.metadata
+                    # Use relative path in archive to avoid absolute path issues
+                    member = tarfile.TarInfo(f"archived_files{filepath}")
+                    member.size = metadata["size"]
+                    member.mtime = int(metadata["mtime"])
+                    member.mode = int(metadata["mode"], 8) & 0o7777
+                    member.uid = metadata["uid"]
+                    member.gid = metadata["gid"]
+                    # Payloads retained by the hashing read skip the
+                    # second disk pass entirely
+                    data = self._archive_bytes.pop(filepath, None)
+                    if data is not None:
+                        tar.addfile(member, io.BytesIO(data))
+                    else:
+                        with open(filepath, 'rb') as f:
+                            tar.addfile(member, f)
+                except Exception as e:
+                    self.logger.error(f"Error archiving file {filepath}: {e}")
+                    self.manifest["errors"].append(f"Archive failed for {filepath}: {e}")
+
     def _create_project_archive(self, project_name: str) -> str:
         """Create tar archive with manifest and selected files."""
         archive_path = self.output_dir / f"{project_name}.tar.gz"
-        
+
         self.logger.info(f"Creating project archive: {archive_path}")
-        
+
+        # gzip level 1 is the default: fingerprint archives carry mixed
+        # payloads where higher levels cost several times the CPU for a
+        # few percent of size
+        compresslevel = self.config.get('archive', {}).get('compresslevel', 1)
+
         try:
-            with tarfile.open(archive_path, "w:gz") as tar:
-                # Add manifest file
-                manifest_path = self.output_dir / "manifest.json"
-                with open(manifest_path, 'w') as f:
-                    json.dump(self.manifest, f, indent=2)
-                tar.add(manifest_path, arcname="manifest.json")
-                
-                # Add archived files
-                for filepath, file_info in self.manifest["files"].items():
-                    if file_info.get("archived", False):
-                        try:
-                            if os.path.exists(filepath):
-                                # Use relative path in archive to avoid absolute path issues
-                                arcname = f"archived_files{filepath}"
-                                tar.add(filepath, arcname=arcname)
-                        except Exception as e:
-                            self.logger.error(f"Error archiving file {filepath}: {e}")
-                            self.manifest["errors"].append(f"Archive failed for {filepath}: {e}")
-            
+            pigz = shutil.which('pigz')
+            if pigz:
+                # Stream an uncompressed tar into pigz so gzip runs in
+                # parallel across cores; member layout is identical to
+                # the tarfile w:gz path
+                self.logger.info("Compressing archive with pigz")
+                with open(archive_path, 'wb') as out:
+                    proc = subprocess.Popen([pigz, f'-{compresslevel}', '-p', str(os.cpu_count() or 1)],
+                                            stdin=subprocess.PIPE, stdout=out)
+                    try:
+                        with tarfile.open(fileobj=proc.stdin, mode='w|') as tar:
+                            self._add_archive_members(tar)
+                    finally:
+                        proc.stdin.close()
+                        returncode = proc.wait()
+                if returncode != 0:
+                    raise RuntimeError(f"pigz exited with status {returncode}")
+            else:
+                with tarfile.open(archive_path, "w:gz", compresslevel=compresslevel) as tar:
+                    self._add_archive_members(tar)
+
             self.logger.info(f"Project archive created successfully: {archive_path}")
             return str(archive_path)
-        
+
         except Exception as e:
             self.logger.error(f"Error creating project archive: {e}")
             raise
@@ -378,18 +823,28 @@ class SystemRecorder:
         # Map scan paths for Docker environment
         mapped_scan_paths = [self._map_path_for_docker(path) for path in scan_paths]
         
-        for path in mapped_scan_paths:
-            if os.path.exists(path):
-                self._scan_directory(path)
-            else:
-                self.logger.warning(f"Scan path does not exist: {path}")
-        
+        # Hash workers run alongside the walk so file reads overlap with
+        # directory enumeration
+        self._hash_executor = ThreadPoolExecutor(max_workers=self._hash_workers())
+        try:
+            for path in mapped_scan_paths:
+                if os.path.exists(path):
+                    self._scan_directory(path)
+                else:
+                    self.logger.warning(f"Scan path does not exist: {path}")
+
+            self._collect_hashes()
+        finally:
+            self._hash_executor.shutdown()
+            self._hash_executor = None
+        self._save_hash_cache()
+
         # Create project archive
         archive_path = self._create_project_archive(project_name)
         
         # Log summary
         total_files = len(self.manifest["files"])
-        archived_files = sum(1 for f in self.manifest["files"].values() if f.get("archived"))
+        archived_files = sum(1 for f in self.manifest["files"].values() if f.archived)
         total_dirs = len(self.manifest["directories"])
         errors = len(self.manifest["errors"])
         
@@ -411,42 +866,43 @@ class SystemRecorder:
             if not before_manifest or not after_manifest:
                 raise ValueError("Could not load project manifests")
             
-            # Find differences
-            before_files = set(before_manifest.get("files", {}).keys())
-            after_files = set(after_manifest.get("files", {}).keys())
-            
-            # Categorize changes
-            new_files = after_files - before_files
-            deleted_files = before_files - after_files
-            common_files = before_files & after_files
-            
+            # Categorize changes; dict key views support set algebra
+            # directly, so no intermediate sets get materialized
+            before_entries = before_manifest.get("files", {})
+            after_entries = after_manifest.get("files", {})
+
+            new_files = after_entries.keys() - before_entries.keys()
+            deleted_files = before_entries.keys() - after_entries.keys()
+            common_files = before_entries.keys() & after_entries.keys()
+
             # Find modified files
-            modified_files = set()
-            for filepath in common_files:
-                before_hash = before_manifest["files"][filepath].get("hash", "")
-                after_hash = after_manifest["files"][filepath].get("hash", "")
-                if before_hash != after_hash:
-                    modified_files.add(filepath)
-            
+            modified_files = {
+                filepath for filepath in common_files
+                if before_entries[filepath].get("hash", "") != after_entries[filepath].get("hash", "")
+            }
+
             # Generate file patterns for inclusion
             all_changed_files = new_files | deleted_files | modified_files
-            
-            # Extract unique directories and file patterns
+
+            # Extract unique directories and file patterns; string
+            # slicing stands in for the three Path constructions the
+            # loop used to make per changed file
             directories = set()
             file_extensions = set()
-            
+
             for filepath in all_changed_files:
                 # Add directory
-                directories.add(str(Path(filepath).parent))
-                
+                slash = filepath.rfind('/')
+                directories.add(filepath[:slash] if slash > 0 else ('/' if slash == 0 else '.'))
+
                 # Add file extension
-                suffix = Path(filepath).suffix
-                if suffix:
-                    file_extensions.add(f"*{suffix}")
-                
+                name = filepath[slash + 1:]
+                dot = name.rfind('.')
+                if dot > 0:
+                    file_extensions.add(f"*{name[dot:]}")
+
                 # Add specific filename patterns for config files
-                name = Path(filepath).name
-                if any(pattern in name.lower() for pattern in ['conf', 'config', 'cfg', 'ini', 'yaml', 'yml', 'json']):
+                if _CFG_RE.search(name):
                     file_extensions.add(name)
             
             # Create targeted configuration
@@ -502,7 +958,7 @@ class SystemRecorder:
             
             # Write configuration file
             with open(output_config_path, 'w') as f:
-                yaml.dump(mode2_config, f, default_flow_style=False, sort_keys=False)
+                yaml.dump(mode2_config, f, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
             
             self.logger.info(f"Generated Mode 2 configuration: {output_config_path}")
             self.logger.info(f"  - New files: {len(new_files)}")
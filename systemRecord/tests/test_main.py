@@ -16,7 +16,7 @@ import sys
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from main import SystemRecorder
+from main import SystemRecorder, _PatternSet
 
 class TestSystemRecorder(unittest.TestCase):
     """Test cases for SystemRecorder class."""
@@ -123,6 +123,60 @@ class TestSystemRecorder(unittest.TestCase):
             self.assertIn('manifest.json', names)
 
 
+class TestPatternMatching(unittest.TestCase):
+    """Equivalence of the compiled glob matcher with Path.match.
+
+    _PatternSet reimplements Path.match semantics (component-bounded
+    wildcards, [!...] classes, absolute vs trailing-component
+    anchoring) for speed; these cases cover the pattern shapes shipped
+    in config/*.yaml plus the corners where the two could drift.
+    """
+
+    PATTERNS = [
+        # Literal names and simple extension globs (config includes)
+        "passwd", "*.conf", "*.config", "*.cfg", "*.ini", "*.json", "*.yaml",
+        # Directory-component excludes
+        "*/tmp/*", "*/temp/*", "*/.git/*", "*/node_modules/*", "*/__pycache__/*",
+        # Absolute excludes
+        "/proc/*", "/sys/*", "/dev/*",
+        # Substring, single-char, and class wildcards
+        "*exclude*", "host?.conf", "[!a]*.log",
+    ]
+
+    PATHS = [
+        "/etc/nginx/nginx.conf", "/etc/app.config", "/etc/rc.cfg",
+        "/etc/settings.yaml", "/etc/passwd", "/etc/hosts",
+        "/etc/host1.conf", "/etc/hosts99.conf",
+        "/tmp/x", "/var/tmp/x", "/a/tmp/b/c", "/home/user/.git/config",
+        "/proc", "/proc/1/status", "/sys/kernel", "/devices/x",
+        "/usr/lib/node_modules/pkg/index.json", "/x/__pycache__/m.pyc",
+        "/srv/exclude_me.txt", "/var/log/app.log", "/var/log/bpp.log",
+        "relative/path.yaml", "tmp/cache.json",
+    ]
+
+    def test_single_patterns_match_path_match(self):
+        """Each pattern alone must agree with Path.match on every path."""
+        for pattern in self.PATTERNS:
+            matcher = _PatternSet([pattern])
+            for path in self.PATHS:
+                with self.subTest(pattern=pattern, path=path):
+                    self.assertEqual(matcher.matches(path), Path(path).match(pattern))
+
+    def test_pattern_set_is_any_match(self):
+        """A full pattern list must behave like any() over Path.match."""
+        matcher = _PatternSet(self.PATTERNS)
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                expected = any(Path(path).match(p) for p in self.PATTERNS)
+                self.assertEqual(matcher.matches(path), expected)
+
+    def test_empty_pattern_set_is_falsy(self):
+        """No patterns means the matcher is falsy and matches nothing."""
+        matcher = _PatternSet([])
+        self.assertFalse(matcher)
+        self.assertFalse(matcher.matches("/etc/passwd"))
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests."""
     